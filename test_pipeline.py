@@ -6,8 +6,18 @@ Demonstrates the complete document processing flow.
 """
 
 import asyncio
+import aiofiles
+import functools
 import httpx
+import importlib.util
+import logging
+import orjson
+import os
 import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
 import json
 
@@ -15,213 +25,414 @@ import json
 API_BASE_URL = "http://localhost:8000/api/v1"
 API_KEY = "test-api-key"  # Replace with actual API key if enabled
 
-async def test_document_upload(file_path: str):
+# Computed once; httpx merges these into every request made by the client
+_HEADERS = {"X-API-Key": API_KEY} if API_KEY else {}
+
+# Poll progress goes through a lazy logger: no string is built unless a
+# handler accepts the record, and nothing is emitted for unchanged stages
+log = logging.getLogger("pipeline_test")
+log.addHandler(logging.NullHandler())
+
+# Upload bodies are streamed in fixed-size chunks so memory use stays flat
+# regardless of document size
+_UPLOAD_CHUNK_SIZE = 256 * 1024
+
+async def _multipart_stream(file_path: str, boundary: str):
+    """Yield a multipart/form-data body chunk by chunk"""
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{Path(file_path).name}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode()
+    async with aiofiles.open(file_path, "rb") as f:
+        while chunk := await f.read(_UPLOAD_CHUNK_SIZE):
+            yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+# Generated schemas are immutable once processing completes, so repeated
+# lookups for the same document are served from memory
+_schema_cache = {}
+
+async def fetch_schema(client: httpx.AsyncClient, document_id: str):
+    """Fetch a document's generated schema, caching by document ID"""
+    cached = _schema_cache.get(document_id)
+    if cached is not None:
+        return cached
+
+    response = await client.get(f"/documents/{document_id}/schema")
+    if response.status_code != 200:
+        print(f"Error retrieving schema: {response.text}")
+        return None
+
+    schema = response.json()
+    _schema_cache[document_id] = schema
+    return schema
+
+def _mock_transport() -> httpx.MockTransport:
+    """In-memory responder for offline smoke runs (MOCK_API=1).
+
+    Serves deterministic payloads for every route the driver touches, with
+    no sockets at all - the full flow completes in milliseconds."""
+    def _respond(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/documents/upload"):
+            return httpx.Response(202, json={"job_id": "mock-job", "document_id": "mock-doc"})
+        if path.endswith("/status"):
+            return httpx.Response(200, json={
+                "status": "completed",
+                "pipeline_state": {"stage": "completed"}
+            })
+        if path.endswith("/schema"):
+            return httpx.Response(200, json={
+                "document_type": "invoice",
+                "confidence_score": 1.0,
+                "validation_status": "passed",
+                "extracted_data": {"fields": {}},
+                "automation_triggers": []
+            })
+        if path.endswith("/webhooks/register"):
+            return httpx.Response(200, json={"webhook_id": "mock-webhook"})
+        if path.endswith("/webhooks/list"):
+            return httpx.Response(200, json={"webhooks": [], "total": 0})
+        return httpx.Response(404, json={"detail": "unmocked route"})
+
+    return httpx.MockTransport(_respond)
+
+@asynccontextmanager
+async def api_client():
+    """Yield one pooled client so all test phases reuse the same keep-alive
+    connections instead of re-handshaking per request"""
+    async with httpx.AsyncClient(
+        base_url=API_BASE_URL,
+        http2=True,  # multiplex the repeated status polls over one stream
+        limits=httpx.Limits(
+            max_keepalive_connections=20,
+            max_connections=100,
+            # Keep idle connections warm across the slow tail of the status
+            # poll (delays back off to 2s) instead of re-handshaking
+            keepalive_expiry=30.0
+        ),
+        timeout=30.0,
+        headers=_HEADERS,
+        transport=_mock_transport() if os.getenv("MOCK_API") else None
+    ) as client:
+        yield client
+
+# Port the push-completion listener binds when PUSH_COMPLETION is set
+_PUSH_PORT = 8001
+
+async def _wait_for_push(client: httpx.AsyncClient, max_wait: float) -> bool:
+    """Wait for the pipeline's document.processed webhook instead of polling.
+
+    Serves a minimal HTTP listener, registers it as a webhook, and blocks on
+    an asyncio.Event until the worker POSTs the completion payload. Returns
+    False on timeout so the caller can fall back to polling (which also
+    covers the race where processing finished before registration landed).
+    """
+    event = asyncio.Event()
+
+    async def _handle(reader, writer):
+        await reader.read(65536)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        writer.close()
+        event.set()
+
+    server = await asyncio.start_server(_handle, "0.0.0.0", _PUSH_PORT)
+    try:
+        response = await client.post(
+            "/webhooks/register",
+            json={
+                "webhook_url": f"http://localhost:{_PUSH_PORT}/done",
+                "webhook_name": "Completion Listener",
+                "events": ["document.processed"]
+            }
+        )
+        if response.status_code >= 300:
+            print(f"   ⚠ Webhook registration failed ({response.status_code}); falling back to polling")
+            return False
+        try:
+            await asyncio.wait_for(event.wait(), timeout=max_wait)
+        except asyncio.TimeoutError:
+            return False
+        print(f"   ✓ Completion webhook received")
+        return True
+    finally:
+        server.close()
+        await server.wait_closed()
+
+@dataclass(slots=True, frozen=True)
+class StatusSnapshot:
+    """One status-poll response, parsed once into typed attributes"""
+    status: str
+    stage: str
+    error: str
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "StatusSnapshot":
+        return cls(
+            status=payload.get("status", "unknown"),
+            stage=payload.get("pipeline_state", {}).get("stage", "unknown"),
+            error=payload.get("error", "Unknown error")
+        )
+
+async def _poll_until_complete(client: httpx.AsyncClient, document_id: str, max_wait: float) -> bool:
+    """Poll document status until completion, failure, or timeout.
+
+    Polls densely at first, then tapers off: short jobs are detected within
+    tens of milliseconds while long jobs are not hammered every second.
+    """
+    delay = 0.05
+    # Integer nanosecond reads: one VDSO call per check, no float subtraction
+    max_wait_ns = int(max_wait * 1e9)
+    start_ns = time.monotonic_ns()
+    last_stage = None
+    while True:
+        response = await client.get(f"/documents/{document_id}/status")
+
+        if response.status_code != 200:
+            print(f"Error checking status: {response.text}")
+            return False
+
+        snapshot = StatusSnapshot.from_payload(response.json())
+
+        if snapshot.status == "completed":
+            print(f"   ✓ Document processing completed")
+            return True
+        elif snapshot.status == "failed":
+            print(f"   ✗ Document processing failed: {snapshot.error}")
+            return False
+
+        if time.monotonic_ns() - start_ns >= max_wait_ns:
+            print("   ⚠ Processing timeout - still in progress")
+            return False
+
+        if snapshot.stage != last_stage:
+            log.info("   ... Processing (Stage: %s)", snapshot.stage)
+            last_stage = snapshot.stage
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.7, 2.0)
+
+async def test_document_upload(client: httpx.AsyncClient, file_path: str):
     """Test document upload and processing"""
-    
+
     print(f"\n{'='*60}")
     print("Document Ingestion Agent - Test Pipeline")
     print(f"{'='*60}\n")
-    
-    async with httpx.AsyncClient() as client:
-        # 1. Upload Document
-        print(f"1. Uploading document: {file_path}")
-        
-        with open(file_path, "rb") as f:
-            files = {"file": (Path(file_path).name, f, "application/pdf")}
-            headers = {"X-API-Key": API_KEY} if API_KEY else {}
-            
-            response = await client.post(
-                f"{API_BASE_URL}/documents/upload",
-                files=files,
-                headers=headers
-            )
-        
-        if response.status_code != 202:
-            print(f"Error uploading document: {response.text}")
-            return
-        
-        upload_result = response.json()
-        job_id = upload_result["job_id"]
-        document_id = upload_result["document_id"]
-        
-        print(f"   ✓ Document uploaded successfully")
-        print(f"   - Job ID: {job_id}")
-        print(f"   - Document ID: {document_id}")
-        
-        # 2. Check Processing Status
-        print(f"\n2. Checking processing status...")
-        
-        max_attempts = 30  # Wait up to 30 seconds
-        for attempt in range(max_attempts):
-            response = await client.get(
-                f"{API_BASE_URL}/documents/{document_id}/status",
-                headers=headers
+
+    # 1. Upload Document
+    print(f"1. Uploading document: {file_path}")
+
+    # Stream the body instead of reading the whole file into memory
+    boundary = uuid.uuid4().hex
+    response = await client.post(
+        "/documents/upload",
+        content=_multipart_stream(file_path, boundary),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+
+    if response.status_code != 202:
+        print(f"Error uploading document: {response.text}")
+        return
+
+    upload_result = response.json()
+    job_id = upload_result["job_id"]
+    document_id = upload_result["document_id"]
+
+    print(f"   ✓ Document uploaded successfully")
+    print(f"   - Job ID: {job_id}")
+    print(f"   - Document ID: {document_id}")
+
+    # 2. Wait for processing to complete
+    print(f"\n2. Waiting for processing to complete...")
+
+    max_wait = 30.0  # seconds
+    completed = False
+
+    # Push mode replaces polling entirely: the pipeline's own
+    # document.processed webhook wakes us the instant processing finishes.
+    # Opt-in because the Celery worker must be able to reach this host.
+    if os.getenv("PUSH_COMPLETION"):
+        completed = await _wait_for_push(client, max_wait)
+
+    if not completed:
+        completed = await _poll_until_complete(client, document_id, max_wait)
+    if not completed:
+        return
+
+    # Start the schema fetch immediately; it runs while the status
+    # output below is being written
+    schema_task = asyncio.create_task(fetch_schema(client, document_id))
+
+    # 3. Retrieve Generated Schema
+    print(f"\n3. Retrieving generated JSON schema...")
+
+    schema = await schema_task
+    if schema is None:
+        return
+
+    print(f"   ✓ Schema retrieved successfully")
+
+    # 4. Display Results
+    print(f"\n4. Document Processing Results:")
+    print(f"   {'='*50}")
+
+    print(f"   Document Type: {schema.get('document_type', 'Unknown')}")
+    print(f"   Confidence Score: {schema.get('confidence_score', 0):.2%}")
+    print(f"   Validation Status: {schema.get('validation_status', 'Unknown')}")
+
+    # Display extracted fields
+    extracted_data = schema.get("extracted_data", {})
+    fields = extracted_data.get("fields", {})
+
+    # Build each section in one pass and flush it with a single write
+    # instead of one syscall per field
+    if fields:
+        lines = [
+            f"   - {name}: {data.get('value', 'N/A')} (confidence: {data.get('confidence', 0):.2%})"
+            if isinstance(data, dict)
+            else f"   - {name}: {data}"
+            for name, data in fields.items()
+        ]
+        sys.stdout.write("\n   Extracted Fields:\n" + "\n".join(lines) + "\n")
+
+    # Display automation triggers
+    triggers = schema.get("automation_triggers", [])
+    if triggers:
+        blocks = [
+            "\n".join(
+                [
+                    f"   - Action: {trigger.get('action', 'Unknown')}",
+                    f"     Endpoint: {trigger.get('endpoint', 'N/A')}",
+                ]
+                + (
+                    [f"     Condition: {json.dumps(trigger['condition'], indent=6)}"]
+                    if trigger.get("condition")
+                    else []
+                )
             )
-            
-            if response.status_code != 200:
-                print(f"Error checking status: {response.text}")
-                return
-            
-            status = response.json()
-            
-            if status["status"] == "completed":
-                print(f"   ✓ Document processing completed")
-                break
-            elif status["status"] == "failed":
-                print(f"   ✗ Document processing failed: {status.get('error', 'Unknown error')}")
-                return
-            else:
-                print(f"   ... Processing (Stage: {status.get('pipeline_state', {}).get('stage', 'unknown')})")
-                await asyncio.sleep(1)
-        else:
-            print("   ⚠ Processing timeout - still in progress")
-            return
-        
-        # 3. Retrieve Generated Schema
-        print(f"\n3. Retrieving generated JSON schema...")
-        
-        response = await client.get(
-            f"{API_BASE_URL}/documents/{document_id}/schema",
-            headers=headers
-        )
-        
-        if response.status_code != 200:
-            print(f"Error retrieving schema: {response.text}")
-            return
-        
-        schema = response.json()
-        print(f"   ✓ Schema retrieved successfully")
-        
-        # 4. Display Results
-        print(f"\n4. Document Processing Results:")
-        print(f"   {'='*50}")
-        
-        print(f"   Document Type: {schema.get('document_type', 'Unknown')}")
-        print(f"   Confidence Score: {schema.get('confidence_score', 0):.2%}")
-        print(f"   Validation Status: {schema.get('validation_status', 'Unknown')}")
-        
-        # Display extracted fields
-        extracted_data = schema.get("extracted_data", {})
-        fields = extracted_data.get("fields", {})
-        
-        if fields:
-            print(f"\n   Extracted Fields:")
-            for field_name, field_data in fields.items():
-                if isinstance(field_data, dict):
-                    value = field_data.get("value", "N/A")
-                    confidence = field_data.get("confidence", 0)
-                    print(f"   - {field_name}: {value} (confidence: {confidence:.2%})")
-                else:
-                    print(f"   - {field_name}: {field_data}")
-        
-        # Display automation triggers
-        triggers = schema.get("automation_triggers", [])
-        if triggers:
-            print(f"\n   Automation Triggers:")
-            for trigger in triggers:
-                print(f"   - Action: {trigger.get('action', 'Unknown')}")
-                print(f"     Endpoint: {trigger.get('endpoint', 'N/A')}")
-                if trigger.get("condition"):
-                    print(f"     Condition: {json.dumps(trigger['condition'], indent=6)}")
-        
-        # Save schema to file
-        output_file = f"output_schema_{document_id}.json"
-        with open(output_file, "w") as f:
-            json.dump(schema, f, indent=2)
-        print(f"\n   ✓ Full schema saved to: {output_file}")
-        
-        print(f"\n{'='*60}")
-        print("Test completed successfully!")
-        print(f"{'='*60}\n")
-
-async def test_webhook_registration():
+            for trigger in triggers
+        ]
+        sys.stdout.write("\n   Automation Triggers:\n" + "\n".join(blocks) + "\n")
+
+    # Save schema to file (orjson serializes in C, aiofiles keeps the
+    # write off the event loop)
+    output_file = f"output_schema_{document_id}.json"
+    async with aiofiles.open(output_file, "wb") as f:
+        await f.write(orjson.dumps(schema, option=orjson.OPT_INDENT_2))
+    print(f"\n   ✓ Full schema saved to: {output_file}")
+
+    print(f"\n{'='*60}")
+    print("Test completed successfully!")
+    print(f"{'='*60}\n")
+
+async def test_webhook_registration(client: httpx.AsyncClient):
     """Test webhook registration"""
     print("\n5. Testing Webhook Registration...")
-    
-    async with httpx.AsyncClient() as client:
-        headers = {"X-API-Key": API_KEY} if API_KEY else {}
-        
-        # Register a webhook
-        webhook_data = {
-            "webhook_url": "https://example.com/webhook",
-            "webhook_name": "Test Webhook",
-            "events": ["document.processed", "document.validated"]
-        }
-        
-        response = await client.post(
-            f"{API_BASE_URL}/webhooks/register",
-            params=webhook_data,
-            headers=headers
-        )
-        
+
+    # Register a webhook
+    webhook_data = {
+        "webhook_url": "https://example.com/webhook",
+        "webhook_name": "Test Webhook",
+        "events": ["document.processed", "document.validated"]
+    }
+
+    response = await client.post(
+        "/webhooks/register",
+        params=webhook_data
+    )
+
+    if response.status_code == 200:
+        result = response.json()
+        print(f"   ✓ Webhook registered: {result['webhook_id']}")
+
+        # List webhooks
+        response = await client.get("/webhooks/list")
+
         if response.status_code == 200:
-            result = response.json()
-            print(f"   ✓ Webhook registered: {result['webhook_id']}")
-            
-            # List webhooks
-            response = await client.get(
-                f"{API_BASE_URL}/webhooks/list",
-                headers=headers
-            )
-            
-            if response.status_code == 200:
-                webhooks = response.json()
-                print(f"   ✓ Total registered webhooks: {webhooks['total']}")
+            webhooks = response.json()
+            print(f"   ✓ Total registered webhooks: {webhooks['total']}")
+
+@functools.cache
+def _has_reportlab() -> bool:
+    """Check once per run whether reportlab is importable"""
+    return importlib.util.find_spec("reportlab") is not None
 
 def create_sample_document():
     """Create a sample document for testing"""
     sample_content = """
     INVOICE
-    
+
     Invoice Number: INV-2024-001
     Date: 01/15/2024
-    
+
     Bill To:
     Acme Corporation
     123 Business Street
     New York, NY 10001
-    
+
     Description             Quantity    Price       Total
     Product A               10          $50.00      $500.00
     Service B               5           $100.00     $500.00
-    
+
     Subtotal:                                       $1000.00
     Tax (10%):                                      $100.00
     Total Amount Due:                               $1100.00
-    
+
     Due Date: 02/15/2024
     """
-    
-    # Create a simple text file as PDF is not easily generated
-    sample_file = "sample_invoice.txt"
-    with open(sample_file, "w") as f:
-        f.write(sample_content)
-    
+
+    # Generate a real PDF when reportlab is installed; otherwise fall back
+    # to a plain text file
+    if _has_reportlab():
+        from reportlab.lib.pagesizes import letter
+        from reportlab.pdfgen import canvas
+
+        sample_file = "sample_invoice.pdf"
+        pdf = canvas.Canvas(sample_file, pagesize=letter)
+        y = letter[1] - 72
+        for line in sample_content.splitlines():
+            pdf.drawString(72, y, line)
+            y -= 14
+        pdf.save()
+    else:
+        sample_file = "sample_invoice.txt"
+        with open(sample_file, "w") as f:
+            f.write(sample_content)
+
     print(f"Created sample document: {sample_file}")
     return sample_file
 
 async def main():
     """Main test function"""
-    
+
     # Check if a file path was provided
     if len(sys.argv) > 1:
         file_path = sys.argv[1]
     else:
         # Create a sample document for testing
         file_path = create_sample_document()
-    
+
     # Verify file exists
     if not Path(file_path).exists():
         print(f"Error: File not found: {file_path}")
         return
-    
-    # Run tests
-    await test_document_upload(file_path)
-    await test_webhook_registration()
+
+    async with api_client() as client:
+        # Webhook registration does not depend on the upload flow, so both
+        # phases run concurrently instead of back to back
+        await asyncio.gather(
+            test_document_upload(client, file_path),
+            test_webhook_registration(client)
+        )
 
 if __name__ == "__main__":
+    # Surface progress logging when run as a script; library-style imports
+    # stay quiet via the NullHandler default
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
     print("Starting Document Ingestion Agent Test...")
     print("Make sure the API server is running on http://localhost:8000")
     print("-" * 60)
-    
+
     asyncio.run(main())
\ No newline at end of file